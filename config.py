@@ -8,6 +8,11 @@ load_dotenv()
 class Config:
     API_KEY = os.getenv('GEMINI_API_KEY')
     DB_PATH = 'blog.db'
-    UPLOAD_FOLDER = 'static/uploads'
+    UPLOAD_FOLDER = 'uploads'  # Outside static/ so only /api/uploads serves these files
+    MAX_UPLOAD_SIZE = 5 * 1024 * 1024  # 5 MB per image
+    MAX_IMAGE_PIXELS = 25_000_000  # ~25 MP; caps decode cost of small-but-huge images
+    UPLOAD_CHUNK_SIZE = 64 * 1024  # Bytes read from the request stream at a time
+    IMAGE_VARIANT_WIDTHS = (320, 800)  # Resized copies generated in the background
+    REPORT_THRESHOLD = 3  # Unique reports needed before a post is auto-flagged
     BAD_WORDS = ["fuck", "shit", "damn", "bitch", "fuckoff"]
     GEMINI_MODEL="gemma-3-1b-it"
\ No newline at end of file
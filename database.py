@@ -1,5 +1,6 @@
 import sqlite3
 from flask import g
+from config import Config
 
 DATABASE = 'blog.db'
 
@@ -37,9 +38,18 @@ def init_db():
         likes INTEGER DEFAULT 0,
         status TEXT DEFAULT 'active', 
         date TEXT NOT NULL,
-        author_ip TEXT
+        author_ip TEXT,
+        image_url TEXT,
+        image_width INTEGER
     )''')
 
+    # Migration: older databases were created before posts could carry an image.
+    post_columns = [row[1] for row in c.execute('PRAGMA table_info(posts)').fetchall()]
+    if 'image_url' not in post_columns:
+        c.execute('ALTER TABLE posts ADD COLUMN image_url TEXT')
+    if 'image_width' not in post_columns:
+        c.execute('ALTER TABLE posts ADD COLUMN image_width INTEGER')
+
     # 2. COMMENTS TABLE
     # Stores user discussions linked to specific posts.
     c.execute('''CREATE TABLE IF NOT EXISTS comments (
@@ -70,6 +80,57 @@ def init_db():
             ip_address TEXT
         )''')
 
+    # Migration: older code stored post_id as a string (e.g. '12' or 'None' when missing).
+    # Convert numeric text back to integers and drop the rest before indexing/backfilling.
+    c.execute("""UPDATE reports SET post_id = CAST(trim(post_id) AS INTEGER)
+        WHERE typeof(post_id) = 'text'
+        AND trim(post_id) GLOB '[0-9]*' AND trim(post_id) NOT GLOB '*[^0-9]*'""")
+    c.execute("DELETE FROM reports WHERE typeof(post_id) NOT IN ('integer', 'null')")
+
+    # Composite UNIQUE index: enforces one report per (Post + IP Address) pair and
+    # doubles as the lookup index on reports(post_id). NULL IPs (legacy rows) never collide.
+    c.execute('''CREATE UNIQUE INDEX IF NOT EXISTS idx_reports_post_ip
+        ON reports (post_id, ip_address)''')
+
+    # report_counts: Running report total per post, maintained by triggers so that
+    # reporting never has to re-count the reports table.
+    c.execute('''CREATE TABLE IF NOT EXISTS report_counts (
+        post_id INTEGER PRIMARY KEY,
+        report_count INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY(post_id) REFERENCES posts(id)
+    )''')
+
+    # Backfill counts for reports logged before report_counts existed (no-op afterwards).
+    c.execute('''INSERT OR IGNORE INTO report_counts (post_id, report_count)
+        SELECT post_id, COUNT(*) FROM reports WHERE typeof(post_id) = 'integer' GROUP BY post_id''')
+
+    # Triggers are recreated on every start so a changed REPORT_THRESHOLD takes effect.
+    c.execute('DROP TRIGGER IF EXISTS trg_reports_insert')
+    c.execute('DROP TRIGGER IF EXISTS trg_reports_delete')
+
+    # On every new report: bump the counter and auto-flag the post once it hits the
+    # threshold, all inside the same transaction as the INSERT itself.
+    c.execute(f'''CREATE TRIGGER trg_reports_insert
+        AFTER INSERT ON reports
+        WHEN NEW.post_id IS NOT NULL
+        BEGIN
+            INSERT INTO report_counts (post_id, report_count) VALUES (NEW.post_id, 1)
+                ON CONFLICT(post_id) DO UPDATE SET report_count = report_count + 1;
+            UPDATE posts SET status = 'flagged'
+                WHERE id = NEW.post_id AND status = 'active'
+                AND (SELECT report_count FROM report_counts WHERE post_id = NEW.post_id)
+                    >= {int(Config.REPORT_THRESHOLD)};
+        END''')
+
+    # Keep the counter in sync when admins clear reports.
+    c.execute('''CREATE TRIGGER trg_reports_delete
+        AFTER DELETE ON reports
+        WHEN OLD.post_id IS NOT NULL
+        BEGIN
+            UPDATE report_counts SET report_count = MAX(0, report_count - 1)
+                WHERE post_id = OLD.post_id;
+        END''')
+
     # 5. ANALYTICS & SECURITY TABLES
     # post_views_log: Ensures we count only 1 view per IP per session (primary key constraint).
     c.execute('''CREATE TABLE IF NOT EXISTS post_views_log (
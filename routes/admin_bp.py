@@ -122,6 +122,7 @@ def moderate_content():
         db.execute("DELETE FROM posts WHERE id = ?", (post_id,))
         db.execute("DELETE FROM comments WHERE post_id = ?", (post_id,))
         db.execute("DELETE FROM reports WHERE post_id = ?", (post_id,))
+        db.execute("DELETE FROM report_counts WHERE post_id = ?", (post_id,))
     else:
         # Soft delete / restore
         db.execute("UPDATE posts SET status = ? WHERE id = ?", (new_status, post_id))
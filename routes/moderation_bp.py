@@ -19,9 +19,18 @@ def is_text_clean(text):
 @moderation_bp.route('/report', methods=['POST'])
 def handle_report():
     """Logs community reports and auto-flags content."""
-    data = request.json
-    post_id = str(data.get('post_id'))
-    reason = data.get('reason', 'General violation')
+    data = request.get_json(silent=True) or {}
+    reason = data.get('reason') or 'General violation'
+
+    try:
+        post_id = int(data.get('post_id'))
+    except (TypeError, ValueError):
+        return jsonify({"error": "A valid post_id is required."}), 400
+
+    # Uniqueness is keyed on the IP; NULLs never collide in the UNIQUE index
+    user_ip = request.remote_addr
+    if not user_ip:
+        return jsonify({"error": "Could not identify the reporter."}), 400
 
     #Cookie Check (Prevents spamming reports)
     cookie_name = f"reported_post_{post_id}"
@@ -30,19 +39,23 @@ def handle_report():
 
     db = get_db()
 
-    # Log the report in the DB
-    db.execute('INSERT INTO reports (post_id, reason, date) VALUES (?, ?, ?)',
-               (post_id, reason, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-
-    # Check report threshold (Flag post if >= 3 reports which will then go for admin review)
-    report_count = db.execute('SELECT COUNT(*) FROM reports WHERE post_id = ?', (post_id,)).fetchone()[0]
-
-    if report_count >= 3:
-        db.execute("UPDATE posts SET status = 'flagged' WHERE id = ?", (post_id,))
-
+    # Log the report in the DB. ON CONFLICT skips repeat reports from the same IP only
+    # (other constraint failures still raise),
+    # and the trg_reports_insert trigger updates report_counts and flags the post
+    # once it reaches Config.REPORT_THRESHOLD unique reports (which will then go for admin review)
+    # Reports for posts that don't exist are never stored.
+    cur = db.execute('''INSERT INTO reports (post_id, reason, date, ip_address)
+                        SELECT ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM posts WHERE id = ?)
+                        ON CONFLICT(post_id, ip_address) DO NOTHING''',
+                     (post_id, reason, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), user_ip, post_id))
     db.commit()
 
+    if cur.rowcount == 0:
+        if not db.execute('SELECT 1 FROM posts WHERE id = ?', (post_id,)).fetchone():
+            return jsonify({"error": "Post not found."}), 404
+        return jsonify({"message": "You have already reported this post."}), 429
+
     #  Set cookie to block multiple reports from same user. One report for one post per user
     resp = make_response(jsonify({"message": "Report logged. Admin will review."}))
     resp.set_cookie(cookie_name, 'true', max_age=60 * 60 * 24 * 30)  # 30 days
-    return resp
\ No newline at end of file
+    return resp
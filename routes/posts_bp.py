@@ -1,13 +1,31 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, send_from_directory, current_app, abort
 from database import get_db
 from datetime import datetime
-import os, re, sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import os, re, sqlite3, hashlib, tempfile
+from PIL import Image, ImageOps, ExifTags
 from werkzeug.utils import secure_filename
 from config import Config
 from routes.ai_bp import clean_text
 
 posts_bp = Blueprint('posts', __name__)
 
+# Resizing is CPU-bound, so it runs here instead of inside the upload request
+thumbnail_pool = ThreadPoolExecutor(max_workers=2)
+
+# Magic bytes -> stored extension. The client's filename/Content-Type is never trusted.
+IMAGE_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+]
+
+# Stored file layout: ab/cd/<sha256>.png or ab/cd/<sha256>_<width>.png for resized variants
+UPLOAD_PATH_PATTERN = re.compile(r'^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(_\d+)?\.(png|jpg|gif|webp)$')
+# Originals only: posts must reference the full image, never one of its variants
+ORIGINAL_PATH_PATTERN = re.compile(r'^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.(png|jpg|gif|webp)$')
+
 
 # --- HELPERS ---
 
@@ -25,6 +43,84 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def detect_image_type(header):
+    """Returns the file extension for a supported image header, or None."""
+    for signature, ext in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return ext
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def image_properties(img):
+    """Returns (width, height, animated) as displayed, i.e. after EXIF orientation. Header-only."""
+    width, height = img.size
+    # Orientations 5-8 rotate the image by 90 degrees, swapping its displayed dimensions
+    if img.getexif().get(ExifTags.Base.Orientation) in (5, 6, 7, 8):
+        width, height = height, width
+    return width, height, getattr(img, 'is_animated', False)
+
+
+def variant_widths(image_width, animated=False):
+    """Resized widths generated for an image; never upscaled, none for animations."""
+    if animated:
+        return []
+    return [w for w in Config.IMAGE_VARIANT_WIDTHS if w < image_width]
+
+
+def add_image_srcset(post):
+    """Adds an 'image_srcset' built from the variants already written to disk."""
+    if not post.get('image_url') or not post.get('image_width'):
+        post['image_srcset'] = None
+        return post
+    rel_path = post['image_url'][len('/api/uploads/'):]
+    base, ext = rel_path.rsplit('.', 1)
+    sources = [f"/api/uploads/{base}_{w}.{ext} {w}w" for w in variant_widths(post['image_width'])
+               if os.path.exists(os.path.join(upload_root(), f"{base}_{w}.{ext}"))]
+    sources.append(f"{post['image_url']} {post['image_width']}w")
+    post['image_srcset'] = ', '.join(sources)
+    return post
+
+
+def upload_root():
+    """Absolute path of the upload folder (Config.UPLOAD_FOLDER is relative to the app)."""
+    return os.path.join(current_app.root_path, Config.UPLOAD_FOLDER)
+
+
+def generate_variants(path, ext):
+    """Background job: writes <hash>_<width>.<ext> copies next to the original."""
+    base = path.rsplit('.', 1)[0]
+    try:
+        with Image.open(path) as src:
+            full_width, _, animated = image_properties(src)
+            widths = [w for w in variant_widths(full_width, animated)
+                      if not os.path.exists(f"{base}_{w}.{ext}")]
+            if not widths:
+                return
+            # JPEG only: decode at a reduced scale that still covers the largest variant
+            scale = max(widths) / full_width
+            src.draft(src.mode, (int(src.width * scale) + 1, int(src.height * scale) + 1))
+            img = ImageOps.exif_transpose(src)
+
+            for width in widths:
+                variant_path = f"{base}_{width}.{ext}"
+                height = round(img.height * width / img.width)
+                resized = img.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+                # Write to a per-job temp file first so a half-written variant is never served,
+                # even if two jobs for the same image run at once
+                tmp = tempfile.NamedTemporaryFile(dir=os.path.dirname(variant_path), suffix='.tmp', delete=False)
+                try:
+                    with tmp:
+                        resized.save(tmp, format=src.format)
+                    os.replace(tmp.name, variant_path)
+                finally:
+                    if os.path.exists(tmp.name):
+                        os.remove(tmp.name)
+    except Exception as e:
+        print(f"Thumbnail Error ({path}): {e}")
+
+
 # --- MAIN POST ROUTES ---
 
 # In routes/posts_bp.py
@@ -59,10 +155,11 @@ def handle_posts():
         posts = [dict(row) for row in db.execute(query, params).fetchall()]
         for post in posts:
             post['user_liked'] = bool(post['user_liked'])
+            add_image_srcset(post)
 
         return jsonify(posts)
 
-    # --- 2. POST: Create New Story (Text Only) ---
+    # --- 2. POST: Create New Story (Text + optional uploaded image) ---
     if request.method == 'POST':
         # Ensure we interpret JSON correctly
         data = request.get_json(force=True, silent=True) or {}
@@ -77,6 +174,19 @@ def handle_posts():
 
         hashtags = clean_text(data.get('hashtags', ''), is_hashtag=True)
 
+        # Only accept images previously stored by /api/uploads
+        image_url = data.get('image_url') or None
+        image_width = None
+        if image_url:
+            if not (isinstance(image_url, str) and image_url.startswith('/api/uploads/')
+                    and ORIGINAL_PATH_PATTERN.match(image_url[len('/api/uploads/'):])):
+                return jsonify({"status": "error", "reason": "Invalid image reference."}), 400
+            image_path = os.path.join(upload_root(), image_url[len('/api/uploads/'):])
+            if not os.path.exists(image_path):
+                return jsonify({"status": "error", "reason": "Invalid image reference."}), 400
+            with Image.open(image_path) as img:
+                image_width = image_properties(img)[0]
+
         # Basic Validation
         if not title or not content:
             return jsonify({"status": "error", "reason": "Title and Content are required."}), 400
@@ -89,13 +199,102 @@ def handle_posts():
             }), 400
 
         # Save to DB
-        db.execute('''INSERT INTO posts (title, content, category, hashtags, views, likes, status, date, author_ip) 
-                     VALUES (?, ?, ?, ?, 0, 0, 'active', ?, ?)''',
+        db.execute('''INSERT INTO posts (title, content, category, hashtags, views, likes, status, date, author_ip,
+                                        image_url, image_width) 
+                     VALUES (?, ?, ?, ?, 0, 0, 'active', ?, ?, ?, ?)''',
                    (title, content, category, hashtags, datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    request.remote_addr))
+                    request.remote_addr, image_url, image_width))
         db.commit()
         return jsonify({"message": "Saved successfully"}), 201
 
+# --- IMAGE UPLOADS ---
+
+@posts_bp.route('/uploads', methods=['POST'])
+def upload_image():
+    """
+    Streams a raw image body to disk chunk by chunk (never held in memory),
+    stores it under its SHA-256 hash and queues resized variants in the background.
+    """
+    if request.content_length and request.content_length > Config.MAX_UPLOAD_SIZE:
+        return jsonify({"error": "File too large."}), 413
+
+    root = upload_root()
+    tmp_dir = os.path.join(root, 'tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    sha = hashlib.sha256()
+    header = b''
+    size = 0
+    tmp = tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False)
+    try:
+        with tmp:
+            while True:
+                chunk = request.stream.read(Config.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > Config.MAX_UPLOAD_SIZE:
+                    raise ValueError("File too large.")
+                if len(header) < 12:
+                    header += chunk[:12 - len(header)]
+                sha.update(chunk)
+                tmp.write(chunk)
+
+        ext = detect_image_type(header)
+        if not ext:
+            raise ValueError("Unsupported image format.")
+        try:
+            # Only parses the header, so this stays cheap for large images
+            with Image.open(tmp.name) as img:
+                image_width, image_height, animated = image_properties(img)
+        except Exception:
+            raise ValueError("Unsupported image format.")
+        # Small files can still decode to huge bitmaps, so cap the pixel count as well
+        if image_width * image_height > Config.MAX_IMAGE_PIXELS:
+            raise ValueError("Image dimensions too large.")
+
+        # Sharded, content-addressed layout: uploads/ab/cd/abcd....png
+        digest = sha.hexdigest()
+        rel_path = f"{digest[:2]}/{digest[2:4]}/{digest}.{ext}"
+        final_path = os.path.join(root, rel_path)
+
+        if os.path.exists(final_path):
+            os.remove(tmp.name)  # Duplicate upload, keep the stored copy
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(tmp.name, final_path)
+            thumbnail_pool.submit(generate_variants, final_path, ext)
+    except ValueError as e:
+        if os.path.exists(tmp.name):
+            os.remove(tmp.name)
+        status = 413 if size > Config.MAX_UPLOAD_SIZE else 400
+        return jsonify({"error": str(e)}), status
+    except Exception:
+        if os.path.exists(tmp.name):
+            os.remove(tmp.name)
+        raise
+
+    base_url = f"/api/uploads/{rel_path.rsplit('.', 1)[0]}"
+    return jsonify({
+        "url": f"/api/uploads/{rel_path}",
+        "hash": digest,
+        "width": image_width,
+        # Variants appear once the background job finishes; clients should fall back to "url"
+        "variants": {str(w): f"{base_url}_{w}.{ext}" for w in variant_widths(image_width, animated)}
+    }), 201
+
+
+@posts_bp.route('/uploads/<path:filename>')
+def serve_upload(filename):
+    """Serves stored images. Content-addressed names never change, so cache them forever."""
+    if not UPLOAD_PATH_PATTERN.match(filename):
+        abort(404)
+    response = send_from_directory(upload_root(), filename, max_age=60 * 60 * 24 * 365)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
 # --- ENGAGEMENT & ANALYTICS ---
 
 @posts_bp.route('/posts/like', methods=['POST'])
@@ -157,7 +356,7 @@ def get_trending():
         ORDER BY score DESC 
         LIMIT 10
     '''
-    return jsonify([dict(row) for row in db.execute(query).fetchall()])
+    return jsonify([add_image_srcset(dict(row)) for row in db.execute(query).fetchall()])
 
 
 # --- COMMENT MANAGEMENT ---
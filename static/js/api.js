@@ -58,10 +58,26 @@ async function loadPosts() {
     }
 }
 
+/**
+ * Uploads an image file and returns its stored URL.
+ * The file is sent as the raw request body (not multipart) so the server
+ * can stream it straight to disk.
+ */
+async function uploadImage(file) {
+    const res = await fetch(`${API_URL}/uploads`, {
+        method: 'POST',
+        headers: { 'Content-Type': file.type || 'application/octet-stream' },
+        body: file
+    });
+    const data = await res.json();
+    if (!res.ok) throw new Error(data.error || "Upload failed");
+    return data.url;
+}
+
 /**
  * Handles the creation of a new post.
  * * Key Features:
- * - Supports Multipart Form Data (required for Image Uploads).
+ * - Uploads the optional cover image first, then sends the post as JSON.
  * - Grabs HTML content from the WYSIWYG editor.
  * - Disables the publish button to prevent double-clicks.
  */
@@ -71,6 +87,7 @@ async function handlePost() {
     const content = document.getElementById('postContent').innerHTML;
     const category = document.getElementById('postCategory').value;
     const hashtags = document.getElementById('postHashtags').value.trim();
+    const imageInput = document.getElementById('postImage');
     const btn = document.getElementById('btnPublish');
 
     if (!title || !category || !content) {
@@ -81,6 +98,11 @@ async function handlePost() {
     btn.disabled = true;
 
     try {
+        let imageUrl = null;
+        if (imageInput && imageInput.files.length) {
+            imageUrl = await uploadImage(imageInput.files[0]);
+        }
+
         const postRes = await fetch(`${API_URL}/posts`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' }, // <--- Back to JSON
@@ -88,7 +110,8 @@ async function handlePost() {
                 title: title,
                 content: content,
                 category: category,
-                hashtags: hashtags
+                hashtags: hashtags,
+                image_url: imageUrl
             })
         });
 
@@ -99,6 +122,7 @@ async function handlePost() {
             document.getElementById('postTitle').value = '';
             document.getElementById('postContent').innerHTML = '';
             document.getElementById('postHashtags').value = '';
+            if (imageInput) imageInput.value = '';
 
             // Reset feed
             filterPosts('all');
@@ -109,7 +133,7 @@ async function handlePost() {
         }
     } catch (e) {
         console.error("Publish Error:", e);
-        showToast("❌ Server error");
+        showToast(`❌ ${e.message || "Server error"}`);
     } finally {
         btn.disabled = false;
     }
@@ -160,6 +160,10 @@ function renderPosts(posts) {
                 </div>` : ''}
 
             
+            ${post.image_url ? `<img class="post-cover" src="${post.image_url}"
+                ${post.image_srcset ? `srcset="${post.image_srcset}" sizes="(max-width: 600px) 100vw, 600px"` : ''}
+                alt="" loading="lazy">` : ''}
+
             <h3>${post.title}</h3>
             
             <div class="post-body">${renderedContent}</div>